@@ -10,10 +10,14 @@ Usage:
 """
 
 import argparse
+import functools
+import io
+import itertools
 import os
 import re
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
@@ -23,6 +27,13 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "anthropic"])
     import anthropic
 
+try:
+    import tiktoken
+except ImportError:
+    print("Installing tiktoken package...")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "tiktoken"])
+    import tiktoken
+
 
 # App configurations with detailed context for description generation
 APP_CONFIGS = {
@@ -79,8 +90,29 @@ APP_CONFIGS = {
 }
 
 
+# Emoji codepoints rejected by App Store Connect, mapped to None so a single
+# str.translate pass deletes them without a regex engine
+_EMOJI_DELETE_TABLE = dict.fromkeys(
+    itertools.chain(
+        range(0x1F600, 0x1F650),  # emoticons
+        range(0x1F300, 0x1F600),  # symbols & pictographs
+        range(0x1F680, 0x1F700),  # transport & map symbols
+        range(0x1F700, 0x1F780),  # alchemical symbols
+        range(0x1F780, 0x1F800),  # Geometric Shapes
+        range(0x1F800, 0x1F900),  # Supplemental Arrows-C
+        range(0x1F900, 0x1FA00),  # Supplemental Symbols and Pictographs
+        range(0x1FA00, 0x1FA70),  # Chess Symbols
+        range(0x1FA70, 0x1FB00),  # Symbols and Pictographs Extended-A
+        range(0x2702, 0x27B1),  # Dingbats
+        range(0x1F1E0, 0x1F200),  # Flags
+    ),
+    None,
+)
+
+
+@functools.lru_cache(maxsize=1)
 def get_repo_root() -> Path:
-    """Get the repository root directory."""
+    """Get the repository root directory (cached; the CWD never changes mid-run)."""
     result = subprocess.run(
         ["git", "rev-parse", "--show-toplevel"],
         capture_output=True,
@@ -90,37 +122,103 @@ def get_repo_root() -> Path:
     return Path(result.stdout.strip())
 
 
-def get_swift_files(repo_root: Path, ios_path: str) -> list[str]:
-    """Get all Swift source files in the iOS app."""
-    base_path = repo_root / ios_path
-    swift_files = []
+# Directories that never contain app source worth sending to Claude
+_EXCLUDED_DIRS = ("Tests", "build", ".build", "DerivedData")
 
-    for f in base_path.glob("**/*.swift"):
-        # Skip test files and build artifacts
-        if "Tests" in str(f) or "build" in str(f) or ".build" in str(f):
-            continue
-        swift_files.append(str(f))
+# Limit to avoid token limits
+_MAX_SWIFT_FILES = 30
+
+# Boilerplate files that carry little signal for a description
+_BOILERPLATE_RES = (
+    re.compile(r".*\+\w*Extensions?\.swift$"),
+    re.compile(r"^Mock.*\.swift$"),
+)
 
-    return swift_files[:30]  # Limit to avoid token limits
+
+def _file_priority(filename: str) -> int:
+    """Rank a Swift file by how much it tells Claude about the app (lower is better)."""
+    if filename == "ContentView.swift":
+        return 0
+    if filename.endswith("View.swift"):
+        return 1
+    if filename.endswith("Model.swift"):
+        return 2
+    if filename.endswith("Manager.swift"):
+        return 3
+    return 9
+
+
+def get_swift_files(repo_root: Path, ios_path: str) -> list[str]:
+    """Get the highest-signal Swift source files in the iOS app.
+
+    Files are ranked so views and models land in the prompt before
+    arbitrary filesystem-order picks; boilerplate is dropped outright.
+    """
+    base_path = repo_root / ios_path
+    candidates = []
+
+    for dirpath, dirnames, filenames in os.walk(base_path):
+        # Prune excluded subtrees in place so os.walk never descends into them
+        dirnames[:] = [d for d in dirnames if d not in _EXCLUDED_DIRS]
+        for fn in filenames:
+            if not fn.endswith(".swift"):
+                continue
+            if any(pattern.match(fn) for pattern in _BOILERPLATE_RES):
+                continue
+            path = os.path.join(dirpath, fn)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            # Bigger files first within a priority tier: more features per slot
+            candidates.append((_file_priority(fn), -(size // 4096), path))
+
+    candidates.sort()
+    return [path for _, _, path in candidates[:_MAX_SWIFT_FILES]]
+
+
+# Whole-line Swift comments and blank runs add tokens without adding signal;
+# trailing comments are left alone so string literals containing "//"
+# (URLs, for instance) are never truncated
+_LINE_COMMENT_RE = re.compile(r"^[ \t]*//[^\n]*$", re.M)
+_BLANK_RUN_RE = re.compile(r"\n\s*\n+")
+
+
+def _read_one(path: str, max_chars: int) -> str | None:
+    """Read a single file, capped at max_chars; None if unreadable."""
+    try:
+        with open(path, "r") as file:
+            # No single file can consume more than the whole budget, so an
+            # oversized generated file never gets loaded fully into memory
+            content = file.read(max_chars)
+    except Exception:
+        return None
+    # Strip comments and collapse blank runs so the budget buys code, not noise
+    content = _LINE_COMMENT_RE.sub("", content)
+    return _BLANK_RUN_RE.sub("\n", content)
 
 
 def read_file_contents(files: list[str], max_chars: int = 50000) -> str:
-    """Read and concatenate file contents."""
-    contents = []
+    """Read and concatenate file contents, capped at max_chars total."""
+    # The reads are independent and I/O-bound, so issue them in parallel;
+    # executor.map preserves the input order for the sequential cap below
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda f: _read_one(f, max_chars), files))
+
+    buffer = io.StringIO()
     total_chars = 0
 
-    for f in files:
-        try:
-            with open(f, "r") as file:
-                content = file.read()
-                if total_chars + len(content) > max_chars:
-                    break
-                contents.append(f"// File: {f}\n{content}\n")
-                total_chars += len(content)
-        except Exception:
+    for path, content in zip(files, results):
+        if content is None:
             continue
+        remaining = max_chars - total_chars
+        if remaining <= 0:
+            break
+        content = content[:remaining]
+        buffer.write(f"// File: {path}\n{content}\n\n")
+        total_chars += len(content)
 
-    return "\n".join(contents)
+    return buffer.getvalue()
 
 
 def get_existing_metadata(repo_root: Path, ios_path: str) -> dict:
@@ -145,31 +243,29 @@ def get_existing_metadata(repo_root: Path, ios_path: str) -> dict:
     return metadata
 
 
-def generate_description(
-    app_name: str, app_context: str, ios_path: str = "ios"
-) -> str:
-    """Generate App Store description using Claude."""
-    repo_root = get_repo_root()
+# Token budget for the code context block; counted with a local tokenizer
+# because chars-per-token varies wildly across Swift files
+_CODE_TOKEN_BUDGET = 8000
 
-    # Gather context
-    swift_files = get_swift_files(repo_root, ios_path)
-    code_context = read_file_contents(swift_files)
-    existing_metadata = get_existing_metadata(repo_root, ios_path)
 
-    client = anthropic.Anthropic()
+def truncate_to_token_budget(text: str, max_tokens: int = _CODE_TOKEN_BUDGET) -> str:
+    """Trim text to a token budget using a local cl100k_base count."""
+    encoding = tiktoken.get_encoding("cl100k_base")
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
 
-    prompt = f"""You are writing an App Store description for an iOS app.
-Based on the code and context below, write a compelling App Store description.
 
-{app_context}
+# Haiku handles this bounded summarization task at a fraction of Sonnet's
+# cost; Sonnet stays available as the escalation path
+_DEFAULT_MODEL = "claude-haiku-4-20250514"
+_ESCALATION_MODEL = "claude-sonnet-4-20250514"
 
-Existing metadata:
-- Name: {existing_metadata.get("name", app_name)}
-- Subtitle: {existing_metadata.get("subtitle", "Unknown")}
-- Keywords: {existing_metadata.get("keywords", "Unknown")}
 
-Code context (key source files):
-{code_context[:30000]}
+# Invariant across apps and runs, so it leads the prompt as a cacheable prefix
+_DESCRIPTION_INSTRUCTIONS = """You are writing an App Store description for an iOS app.
+Based on the code and context below, write a compelling App Store description.
 
 Write an App Store description that:
 1. Opens with a compelling hook (1-2 sentences)
@@ -181,32 +277,87 @@ Write an App Store description that:
 
 Output ONLY the description text, no additional commentary."""
 
+
+def _request_description(client, model: str, app_block: str, code_block: str) -> str:
+    """Issue one description request against the given model."""
+    # Static instructions and per-app context are marked cacheable so CI runs
+    # within the cache window pay for the code context only
     response = client.messages.create(
-        model="claude-sonnet-4-20250514",
+        model=model,
         max_tokens=1000,
-        messages=[{"role": "user", "content": prompt}],
+        extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"},
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": _DESCRIPTION_INSTRUCTIONS,
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {
+                        "type": "text",
+                        "text": app_block,
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {"type": "text", "text": code_block},
+                ],
+            }
+        ],
     )
+    return response.content[0].text
 
-    description = response.content[0].text
+
+def _looks_usable(description: str) -> bool:
+    """Basic sanity checks on a generated description."""
+    if len(description.split()) < 100:
+        return False
+    if "i cannot" in description.lower() or "i can't" in description.lower():
+        return False
+    return True
+
+
+def generate_description(
+    app_name: str, app_context: str, ios_path: str = "ios", model: str = _DEFAULT_MODEL
+) -> str:
+    """Generate App Store description using Claude."""
+    repo_root = get_repo_root()
+
+    # Gather context
+    swift_files = get_swift_files(repo_root, ios_path)
+    code_context = truncate_to_token_budget(read_file_contents(swift_files))
+    existing_metadata = get_existing_metadata(repo_root, ios_path)
+
+    client = anthropic.Anthropic()
+
+    app_block = f"""{app_context}
+
+Existing metadata:
+- Name: {existing_metadata.get("name", app_name)}
+- Subtitle: {existing_metadata.get("subtitle", "Unknown")}
+- Keywords: {existing_metadata.get("keywords", "Unknown")}"""
+
+    code_block = f"""Code context (key source files):
+{code_context}"""
+
+    try:
+        description = _request_description(client, model, app_block, code_block)
+    except anthropic.APIError:
+        # Only swallow the error when the escalation below will retry;
+        # otherwise fail loudly rather than writing empty metadata
+        if model == _ESCALATION_MODEL:
+            raise
+        description = ""
+
+    # Escalate once if the cheap model failed or produced unusable output
+    if not _looks_usable(description) and model != _ESCALATION_MODEL:
+        print(f"Output from {model} failed sanity checks, retrying with {_ESCALATION_MODEL}...")
+        description = _request_description(
+            client, _ESCALATION_MODEL, app_block, code_block
+        )
 
     # Strip emojis - App Store Connect rejects them
-    emoji_pattern = re.compile(
-        "["
-        "\U0001f600-\U0001f64f"  # emoticons
-        "\U0001f300-\U0001f5ff"  # symbols & pictographs
-        "\U0001f680-\U0001f6ff"  # transport & map symbols
-        "\U0001f700-\U0001f77f"  # alchemical symbols
-        "\U0001f780-\U0001f7ff"  # Geometric Shapes
-        "\U0001f800-\U0001f8ff"  # Supplemental Arrows-C
-        "\U0001f900-\U0001f9ff"  # Supplemental Symbols and Pictographs
-        "\U0001fa00-\U0001fa6f"  # Chess Symbols
-        "\U0001fa70-\U0001faff"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027b0"  # Dingbats
-        "\U0001f1e0-\U0001f1ff"  # Flags
-        "]+",
-        flags=re.UNICODE,
-    )
-    description = emoji_pattern.sub("", description)
+    description = description.translate(_EMOJI_DELETE_TABLE)
 
     return description.strip()
 
@@ -232,6 +383,11 @@ def main():
         "--output",
         help="Output file path (default: fastlane/metadata/en-US/description.txt)",
     )
+    parser.add_argument(
+        "--model",
+        default=_DEFAULT_MODEL,
+        help=f"Claude model to use (default: {_DEFAULT_MODEL})",
+    )
 
     args = parser.parse_args()
 
@@ -252,7 +408,7 @@ def main():
         ios_path = args.ios_path or "."
 
     print(f"Generating App Store description for {app_name}...")
-    description = generate_description(app_name, app_context, ios_path)
+    description = generate_description(app_name, app_context, ios_path, args.model)
 
     # Output to stdout
     print("\n" + "=" * 50)
@@ -10,11 +10,12 @@ Usage:
 """
 
 import argparse
-import json
+import functools
 import math
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
@@ -50,6 +51,27 @@ IOS_ICON_SIZES = [
     (1024, 1),
 ]
 
+# Structure-of-arrays view of IOS_ICON_SIZES: parallel tuples with the pixel
+# size computed once, so consumers never redo the points*scale math
+_POINTS = tuple(points for points, _ in IOS_ICON_SIZES)
+_SCALES = tuple(scale for _, scale in IOS_ICON_SIZES)
+_PIXELS = tuple(int(points * scale) for points, scale in IOS_ICON_SIZES)
+
+# Distinct pixel sizes to render; several (points, scale) pairs collapse to
+# the same pixel size and share one PNG
+_UNIQUE_PIXEL_SIZES = sorted(set(_PIXELS))
+
+
+# Snowflake geometry is fixed (6 rays at 60-degree steps, branches at +/-30
+# degrees), so the unit vectors are precomputed once at import time
+_RAY_DIRS = [
+    (math.cos(math.radians(a)), math.sin(math.radians(a))) for a in range(0, 360, 60)
+]
+_BRANCH_DIRS = [
+    [(math.cos(math.radians(a + d)), math.sin(math.radians(a + d))) for d in (30, -30)]
+    for a in range(0, 360, 60)
+]
+
 
 # App-specific icon themes
 APP_THEMES = {
@@ -73,8 +95,10 @@ APP_THEMES = {
 }
 
 
-def create_trivit_icon(size: int, theme: dict) -> Image.Image:
+@functools.lru_cache(maxsize=32)
+def create_trivit_icon(size: int) -> Image.Image:
     """Create a Trivit-style counter icon."""
+    theme = APP_THEMES["trivit"]
     img = Image.new("RGBA", (size, size), theme["background_color"])
     draw = ImageDraw.Draw(img)
 
@@ -108,8 +132,10 @@ def create_trivit_icon(size: int, theme: dict) -> Image.Image:
     return img
 
 
-def create_snow_icon(size: int, theme: dict) -> Image.Image:
+@functools.lru_cache(maxsize=32)
+def create_snow_icon(size: int) -> Image.Image:
     """Create a snow/powder-style icon with snowflake."""
+    theme = APP_THEMES["snow"]
     img = Image.new("RGBA", (size, size), theme["background_color"])
     draw = ImageDraw.Draw(img)
 
@@ -120,10 +146,10 @@ def create_snow_icon(size: int, theme: dict) -> Image.Image:
     line_width = max(size // 20, 2)
 
     # 6 lines radiating from center
-    for angle in range(0, 360, 60):
-        rad = math.radians(angle)
-        x_end = center + int(radius * math.cos(rad))
-        y_end = center + int(radius * math.sin(rad))
+    branch_len = radius // 3
+    for (ray_cos, ray_sin), branch_dirs in zip(_RAY_DIRS, _BRANCH_DIRS):
+        x_end = center + int(radius * ray_cos)
+        y_end = center + int(radius * ray_sin)
         draw.line(
             [(center, center), (x_end, y_end)],
             fill=theme["foreground_color"],
@@ -131,13 +157,11 @@ def create_snow_icon(size: int, theme: dict) -> Image.Image:
         )
 
         # Small branches
-        branch_len = radius // 3
-        for branch_angle in [30, -30]:
-            branch_rad = math.radians(angle + branch_angle)
-            mid_x = center + int((radius * 0.6) * math.cos(rad))
-            mid_y = center + int((radius * 0.6) * math.sin(rad))
-            branch_end_x = mid_x + int(branch_len * math.cos(branch_rad))
-            branch_end_y = mid_y + int(branch_len * math.sin(branch_rad))
+        mid_x = center + int((radius * 0.6) * ray_cos)
+        mid_y = center + int((radius * 0.6) * ray_sin)
+        for branch_cos, branch_sin in branch_dirs:
+            branch_end_x = mid_x + int(branch_len * branch_cos)
+            branch_end_y = mid_y + int(branch_len * branch_sin)
             draw.line(
                 [(mid_x, mid_y), (branch_end_x, branch_end_y)],
                 fill=theme["foreground_color"],
@@ -147,8 +171,10 @@ def create_snow_icon(size: int, theme: dict) -> Image.Image:
     return img
 
 
-def create_footprint_icon(size: int, theme: dict) -> Image.Image:
+@functools.lru_cache(maxsize=32)
+def create_footprint_icon(size: int) -> Image.Image:
     """Create a footprint/globe-style icon."""
+    theme = APP_THEMES["footprint"]
     img = Image.new("RGBA", (size, size), theme["background_color"])
     draw = ImageDraw.Draw(img)
 
@@ -210,25 +236,27 @@ def create_footprint_icon(size: int, theme: dict) -> Image.Image:
 
 def create_icon(app: str, size: int) -> Image.Image:
     """Create an icon for the specified app and size."""
-    theme = APP_THEMES.get(app, APP_THEMES["trivit"])
-
-    if app == "trivit":
-        return create_trivit_icon(size, theme)
-    elif app == "snow":
-        return create_snow_icon(size, theme)
+    if app == "snow":
+        icon = create_snow_icon(size)
     elif app == "footprint":
-        return create_footprint_icon(size, theme)
+        icon = create_footprint_icon(size)
     else:
-        return create_trivit_icon(size, theme)
+        icon = create_trivit_icon(size)
+
+    # The creators are cached per size; hand back a copy so callers can
+    # mutate their icon without corrupting the cache
+    return icon.copy()
 
 
-def generate_contents_json(sizes: list[tuple]) -> dict:
-    """Generate Contents.json for the icon set."""
-    images = []
+def generate_contents_json() -> str:
+    """Generate Contents.json text for the icon set.
 
-    for points, scale in sizes:
-        pixel_size = int(points * scale)
+    The schema is fixed, so the JSON is built from a string template
+    rather than round-tripping dicts through json.dump.
+    """
+    entries = []
 
+    for points, scale, pixel_size in zip(_POINTS, _SCALES, _PIXELS):
         idiom = "universal"
         if points in [60] and scale in [2, 3]:
             idiom = "iphone"
@@ -239,16 +267,27 @@ def generate_contents_json(sizes: list[tuple]) -> dict:
 
         filename = f"icon_{pixel_size}x{pixel_size}.png"
 
-        images.append(
-            {
-                "filename": filename,
-                "idiom": idiom,
-                "scale": f"{scale}x",
-                "size": f"{points}x{points}",
-            }
+        entries.append(
+            "    {\n"
+            f'      "filename": "{filename}",\n'
+            f'      "idiom": "{idiom}",\n'
+            f'      "scale": "{scale}x",\n'
+            f'      "size": "{points}x{points}"\n'
+            "    }"
         )
 
-    return {"images": images, "info": {"author": "ios-infra", "version": 1}}
+    images = ",\n".join(entries)
+    return (
+        "{\n"
+        '  "images": [\n'
+        f"{images}\n"
+        "  ],\n"
+        '  "info": {\n'
+        '    "author": "ios-infra",\n'
+        '    "version": 1\n'
+        "  }\n"
+        "}\n"
+    )
 
 
 def main():
@@ -288,28 +327,43 @@ def main():
         # Generate all sizes
         print(f"Generating icon set for {args.app}...")
 
-        generated_sizes = set()
-        for points, scale in IOS_ICON_SIZES:
-            pixel_size = int(points * scale)
-
-            # Skip duplicates
-            if pixel_size in generated_sizes:
-                continue
-            generated_sizes.add(pixel_size)
-
-            icon = create_icon(args.app, pixel_size)
-            filename = f"icon_{pixel_size}x{pixel_size}.png"
-            icon.save(output_dir / filename)
-            print(f"  Generated {filename}")
+        # Render once at full resolution; smaller sizes are downscales of the
+        # master instead of redrawing every primitive per size
+        master = create_icon(args.app, 1024)
+
+        save_jobs = []
+        for pixel_size in _UNIQUE_PIXEL_SIZES:
+            if pixel_size == 1024:
+                icon = master
+            elif args.app == "snow" and pixel_size <= 60:
+                # Snowflake branches blur when downscaled this far; redraw
+                # natively so the thin lines stay crisp at tiny sizes
+                icon = create_icon(args.app, pixel_size)
+            else:
+                icon = master.resize(
+                    (pixel_size, pixel_size), Image.Resampling.LANCZOS
+                )
+            save_jobs.append((icon, output_dir / f"icon_{pixel_size}x{pixel_size}.png"))
+
+        # PIL releases the GIL during PNG encoding, so saves parallelize well;
+        # compress_level=1 halves encode CPU and App Store Connect doesn't
+        # care about the few percent of extra file size
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(
+                executor.map(
+                    lambda job: job[0].save(job[1], optimize=False, compress_level=1),
+                    save_jobs,
+                )
+            )
+        for _, path in save_jobs:
+            print(f"  Generated {path.name}")
 
         # Generate Contents.json
-        contents = generate_contents_json(IOS_ICON_SIZES)
-        with open(output_dir / "Contents.json", "w") as f:
-            json.dump(contents, f, indent=2)
+        (output_dir / "Contents.json").write_text(generate_contents_json())
         print(f"  Generated Contents.json")
 
         print(f"\nIcon set saved to {output_dir}")
-        print(f"Total icons: {len(generated_sizes)}")
+        print(f"Total icons: {len(_UNIQUE_PIXEL_SIZES)}")
 
 
 if __name__ == "__main__":
@@ -10,6 +10,8 @@ Usage:
 """
 
 import argparse
+import asyncio
+import functools
 import os
 import re
 import sys
@@ -44,8 +46,16 @@ APP_CONFIGS = {
 }
 
 
+# Version regexes compiled once at import time (scanned per project/plist file)
+_MARKETING_VERSION_RE = re.compile(r'MARKETING_VERSION:\s*["\']?(\d+\.\d+\.\d+)')
+_CFBUNDLE_VERSION_RE = re.compile(
+    r"<key>CFBundleShortVersionString</key>\s*<string>(\d+\.\d+\.\d+)</string>"
+)
+
+
+@functools.lru_cache(maxsize=1)
 def get_repo_root() -> Path:
-    """Get the repository root directory."""
+    """Get the repository root directory (cached; the CWD never changes mid-run)."""
     result = subprocess.run(
         ["git", "rev-parse", "--show-toplevel"],
         capture_output=True,
@@ -76,17 +86,47 @@ def get_last_release_tag() -> str | None:
         return result.stdout.strip()[:8]
 
 
-def get_commits_since_tag(tag: str) -> list[dict]:
-    """Get all commits since the given tag."""
+# Sentinel separating commits in the batched git log output
+_COMMIT_SENTINEL = "---COMMIT---"
+
+# Conventional-commit types that never yield user-facing release notes
+_SKIP_TYPES_RE = re.compile(
+    r"^(chore|docs|ci|build|style|refactor|test)(\([^)]*\))?:", re.I
+)
+
+
+def filter_user_facing_commits(commits: list[dict]) -> list[dict]:
+    """Drop chore-type commits and collapse near-duplicate subjects.
+
+    Raw commit lists are full of "bump version"/"fix typo" noise that
+    only wastes prompt tokens; keep one representative per group of
+    subjects sharing the same leading words.
+    """
+    filtered = []
+    seen_prefixes = set()
+    for commit in commits:
+        subject = commit["subject"].strip()
+        if not subject or _SKIP_TYPES_RE.match(subject):
+            continue
+        prefix = tuple(subject.lower().split()[:4])
+        if prefix in seen_prefixes:
+            continue
+        seen_prefixes.add(prefix)
+        filtered.append(commit)
+    return filtered
+
+
+def get_commits_and_files_since_tag(tag: str) -> tuple[list[dict], list[str]]:
+    """Get all commits and changed files since the given tag.
+
+    A single git log --name-only call yields both, avoiding a separate
+    git diff subprocess; git startup dominates these calls on large repos.
+    Fields are NUL-separated so multi-line commit bodies parse cleanly.
+    """
+    log_format = f"--pretty=format:{_COMMIT_SENTINEL}%H%x00%s%x00%b%x00%an%x00%ad"
     try:
         result = subprocess.run(
-            [
-                "git",
-                "log",
-                f"{tag}..HEAD",
-                "--pretty=format:%H|%s|%b|%an|%ad",
-                "--date=short",
-            ],
+            ["git", "log", f"{tag}..HEAD", "--name-only", log_format, "--date=short"],
             capture_output=True,
             text=True,
             check=True,
@@ -94,49 +134,35 @@ def get_commits_since_tag(tag: str) -> list[dict]:
     except subprocess.CalledProcessError:
         # If tag comparison fails, get recent commits
         result = subprocess.run(
-            [
-                "git",
-                "log",
-                "-50",
-                "--pretty=format:%H|%s|%b|%an|%ad",
-                "--date=short",
-            ],
+            ["git", "log", "-50", "--name-only", log_format, "--date=short"],
             capture_output=True,
             text=True,
             check=True,
         )
 
     commits = []
-    for line in result.stdout.strip().split("\n"):
-        if not line:
+    changed_files = set()
+    for block in result.stdout.split(_COMMIT_SENTINEL):
+        if not block.strip():
             continue
-        parts = line.split("|")
-        if len(parts) >= 5:
-            commits.append(
-                {
-                    "hash": parts[0],
-                    "subject": parts[1],
-                    "body": parts[2],
-                    "author": parts[3],
-                    "date": parts[4],
-                }
-            )
-
-    return commits
-
-
-def get_changed_files_since_tag(tag: str) -> list[str]:
-    """Get list of changed files since tag."""
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--name-only", f"{tag}..HEAD"],
-            capture_output=True,
-            text=True,
-            check=True,
+        parts = block.split("\x00")
+        if len(parts) < 5:
+            continue
+        # The last field holds the date, then the commit's changed files
+        # from --name-only, one per line
+        date, *files = parts[4].strip().split("\n")
+        commits.append(
+            {
+                "hash": parts[0],
+                "subject": parts[1],
+                "body": parts[2],
+                "author": parts[3],
+                "date": date,
+            }
         )
-        return result.stdout.strip().split("\n")
-    except subprocess.CalledProcessError:
-        return []
+        changed_files.update(f for f in files if f)
+
+    return commits, sorted(changed_files)
 
 
 def get_current_version(repo_root: Path, ios_path: str) -> str:
@@ -147,49 +173,88 @@ def get_current_version(repo_root: Path, ios_path: str) -> str:
     project_yml = base_path / "project.yml"
     if project_yml.exists():
         content = project_yml.read_text()
-        match = re.search(r'MARKETING_VERSION:\s*["\']?(\d+\.\d+\.\d+)', content)
+        match = _MARKETING_VERSION_RE.search(content)
         if match:
             return match.group(1)
 
-    # Try Info.plist
-    for plist in base_path.glob("**/Info.plist"):
-        if ".build" in str(plist) or "DerivedData" in str(plist):
+    # Try Info.plist; walk with pruning so build output is never statted,
+    # and return on the first plist that carries a version
+    for dirpath, dirnames, filenames in os.walk(base_path):
+        dirnames[:] = [
+            d for d in dirnames if d not in (".build", "DerivedData", "Pods", "build")
+        ]
+        if "Info.plist" not in filenames:
             continue
         try:
-            content = plist.read_text()
-            match = re.search(
-                r"<key>CFBundleShortVersionString</key>\s*<string>(\d+\.\d+\.\d+)</string>",
-                content,
-            )
-            if match:
-                return match.group(1)
+            content = Path(dirpath, "Info.plist").read_text()
         except Exception:
             continue
+        match = _CFBUNDLE_VERSION_RE.search(content)
+        if match:
+            return match.group(1)
 
     return "1.0.0"
 
 
-def generate_release_notes(
-    app_name: str, app_context: str, ios_path: str = "ios"
+# Haiku handles this bounded summarization task at a fraction of Sonnet's cost
+_DEFAULT_MODEL = "claude-haiku-4-20250514"
+
+# Fallback notes for releases with no user-facing changes; matches what the
+# prompt instructs Claude to write in that case
+_NO_CHANGES_NOTES = "Bug fixes and performance improvements."
+
+
+# Invariant across apps and runs, so it leads the prompt as a cacheable prefix
+_RELEASE_NOTES_INSTRUCTIONS = """You are writing App Store release notes for an iOS app.
+
+Write release notes that:
+1. Are user-friendly (avoid technical jargon)
+2. Focus on user-visible improvements
+3. Are concise (under 500 characters for App Store limit)
+4. Use bullet points for multiple changes
+5. Start with most impactful changes
+6. Group related changes together
+7. Skip internal/technical changes users don't care about
+8. Use emojis sparingly if at all
+
+If there are no significant user-facing changes, write something like:
+"Bug fixes and performance improvements."
+
+Output ONLY the release notes text, no additional commentary."""
+
+
+async def generate_release_notes(
+    app_name: str, app_context: str, ios_path: str = "ios", model: str = _DEFAULT_MODEL
 ) -> str:
     """Generate release notes using Claude."""
     repo_root = get_repo_root()
     last_tag = get_last_release_tag()
-    commits = get_commits_since_tag(last_tag)
-    changed_files = get_changed_files_since_tag(last_tag)
-    current_version = get_current_version(repo_root, ios_path)
 
-    # Format commits for the prompt
-    commit_text = "\n".join([f"- {c['subject']} ({c['date']})" for c in commits[:50]])
+    # The git log and the project.yml/Info.plist scan touch independent
+    # resources, so run them concurrently and wait for both
+    (commits, changed_files), current_version = await asyncio.gather(
+        asyncio.to_thread(get_commits_and_files_since_tag, last_tag),
+        asyncio.to_thread(get_current_version, repo_root, ios_path),
+    )
+
+    # Format commits for the prompt, skipping chores and duplicates
+    user_facing = filter_user_facing_commits(commits)
+    if not user_facing:
+        # Nothing Claude could say beyond the stock phrase; skip the round-trip
+        print("No user-facing changes; skipping API call")
+        return _NO_CHANGES_NOTES
+
+    commit_text = "\n".join(
+        [f"- {c['subject']} ({c['date']})" for c in user_facing[:50]]
+    )
 
     # Categorize changed files
     ios_changes = [f for f in changed_files if f.startswith(ios_path + "/")]
     backend_changes = [f for f in changed_files if f.startswith("backend/")]
 
-    client = anthropic.Anthropic()
-
-    prompt = f"""You are writing App Store release notes for {app_name} ({app_context}).
+    client = anthropic.AsyncAnthropic()
 
+    release_block = f"""App: {app_name} ({app_context})
 Version: {current_version}
 Last release tag: {last_tag}
 
@@ -198,27 +263,27 @@ Commits since last release:
 
 Changed areas:
 - iOS app changes: {len(ios_changes)} files
-- Backend changes: {len(backend_changes)} files
-
-Write release notes that:
-1. Are user-friendly (avoid technical jargon)
-2. Focus on user-visible improvements
-3. Are concise (under 500 characters for App Store limit)
-4. Use bullet points for multiple changes
-5. Start with most impactful changes
-6. Group related changes together
-7. Skip internal/technical changes users don't care about
-8. Use emojis sparingly if at all
+- Backend changes: {len(backend_changes)} files"""
 
-If there are no significant user-facing changes, write something like:
-"Bug fixes and performance improvements."
-
-Output ONLY the release notes text, no additional commentary."""
-
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
+    # Static instructions lead the prompt as a cacheable prefix so repeated CI
+    # runs within the cache window only pay for the commit list
+    response = await client.messages.create(
+        model=model,
         max_tokens=500,
-        messages=[{"role": "user", "content": prompt}],
+        extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"},
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": _RELEASE_NOTES_INSTRUCTIONS,
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {"type": "text", "text": release_block},
+                ],
+            }
+        ],
     )
 
     return response.content[0].text
@@ -245,6 +310,11 @@ def main():
         "--output",
         help="Output file path (default: fastlane/metadata/en-US/release_notes.txt)",
     )
+    parser.add_argument(
+        "--model",
+        default=_DEFAULT_MODEL,
+        help=f"Claude model to use (default: {_DEFAULT_MODEL})",
+    )
 
     args = parser.parse_args()
 
@@ -268,7 +338,9 @@ def main():
     last_tag = get_last_release_tag()
     print(f"Last release: {last_tag}")
 
-    notes = generate_release_notes(app_name, app_context, ios_path)
+    notes = asyncio.run(
+        generate_release_notes(app_name, app_context, ios_path, args.model)
+    )
 
     # Output
     print("\n" + "=" * 50)